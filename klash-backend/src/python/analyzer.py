@@ -1,32 +1,43 @@
 import sys
-import json
-from textblob import TextBlob
+import os
+import orjson
+from functools import lru_cache
+from multiprocessing import Pool
+from textblob.en import sentiment as pattern_sentiment
 from typing import List, Dict, Any, Tuple
-import spacy
+import numpy as np
+from json_io import write_json, serve_worker
 
-# Load the English language model
-nlp = spacy.load("en_core_web_sm")
+# Load TextBlob's sentiment lexicon once at import instead of on the first tweet
+len(pattern_sentiment)
 
-def preprocess_text(text: str) -> str:
-    """Preprocess text for sentiment analysis"""
-    # Remove URLs, mentions, and special characters
-    doc = nlp(text)
-    tokens = [token.lemma_.lower() for token in doc 
-              if not token.is_stop and not token.is_punct 
-              and not token.like_url and not token.like_email]
-    return " ".join(tokens)
+# Below this many tweets, process startup outweighs multi-core scoring
+PARALLEL_MIN_TWEETS = 5000
 
+@lru_cache(maxsize=50_000)
 def analyze_sentiment(text: str) -> Tuple[float, float]:
     """Analyze sentiment of a single text"""
-    # Preprocess text
-    processed_text = preprocess_text(text)
+    # Nothing to score; skip the tokenizer entirely
+    if not text or text.isspace():
+        return 0.0, 0.0
     
-    # Get sentiment using TextBlob
-    blob = TextBlob(processed_text)
+    # Score against TextBlob's pattern lexicon directly. This is exactly what
+    # TextBlob(text).sentiment runs, without building a TextBlob per tweet.
+    # The raw text is used since the lexicon scores inflected forms directly.
+    polarity, subjectivity = pattern_sentiment(text)
     
     # Polarity: -1 (negative) to 1 (positive)
     # Subjectivity: 0 (objective) to 1 (subjective)
-    return blob.sentiment.polarity, blob.sentiment.subjectivity
+    return polarity, subjectivity
+
+def analyze_sentiments(texts: List[str]) -> List[Tuple[float, float]]:
+    """Analyze sentiment of many texts, spreading large batches across cores"""
+    if len(texts) < PARALLEL_MIN_TWEETS:
+        return [analyze_sentiment(text) for text in texts]
+    
+    workers = max(1, (os.cpu_count() or 2) // 2)
+    with Pool(workers) as pool:
+        return pool.map(analyze_sentiment, texts, chunksize=256)
 
 def process_tweets(tweets: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Process multiple tweets and return aggregated sentiment analysis"""
@@ -39,25 +50,20 @@ def process_tweets(tweets: List[Dict[str, Any]]) -> Dict[str, Any]:
             "sentiments": []
         }
     
-    sentiments = []
-    total_polarity = 0.0
-    total_subjectivity = 0.0
+    scores = analyze_sentiments([tweet.get('text', '') for tweet in tweets])
     
-    for tweet in tweets:
-        text = tweet.get('text', '')
-        polarity, subjectivity = analyze_sentiment(text)
-        
-        sentiments.append({
-            "tweet_id": tweet.get('id', ''),
-            "polarity": polarity,
-            "subjectivity": subjectivity
-        })
-        
-        total_polarity += polarity
-        total_subjectivity += subjectivity
+    sentiments = [{
+        "tweet_id": tweet.get('id', ''),
+        "polarity": polarity,
+        "subjectivity": subjectivity
+    } for tweet, (polarity, subjectivity) in zip(tweets, scores)]
+    
+    # Aggregate with numpy instead of accumulating scalars per tweet
+    polarities = np.fromiter((s['polarity'] for s in sentiments), dtype=np.float64, count=len(sentiments))
+    subjectivities = np.fromiter((s['subjectivity'] for s in sentiments), dtype=np.float64, count=len(sentiments))
     
-    avg_polarity = total_polarity / len(tweets)
-    avg_subjectivity = total_subjectivity / len(tweets)
+    avg_polarity = float(polarities.mean())
+    avg_subjectivity = float(subjectivities.mean())
     
     # Determine overall outcome
     if avg_polarity > 0.3:
@@ -78,30 +84,52 @@ def process_tweets(tweets: List[Dict[str, Any]]) -> Dict[str, Any]:
 def main():
     # Read tweets from stdin
     try:
-        input_data = sys.stdin.read()
+        input_data = sys.stdin.buffer.read()
         if not input_data.strip():
-            print(json.dumps({
+            print(orjson.dumps({
                 "error": "No input data provided"
-            }), file=sys.stderr)
+            }).decode(), file=sys.stderr)
             sys.exit(1)
             
-        tweets = json.loads(input_data)
+        tweets = orjson.loads(input_data)
         if not isinstance(tweets, list):
             tweets = [tweets]
             
-        result = process_tweets(tweets)
-        print(json.dumps(result, indent=2))
+        write_json(process_tweets(tweets))
         
-    except json.JSONDecodeError as e:
-        print(json.dumps({
+    except orjson.JSONDecodeError as e:
+        print(orjson.dumps({
             "error": f"Invalid JSON input: {str(e)}"
-        }), file=sys.stderr)
+        }).decode(), file=sys.stderr)
         sys.exit(1)
     except Exception as e:
-        print(json.dumps({
+        print(orjson.dumps({
             "error": f"Error processing tweets: {str(e)}"
-        }), file=sys.stderr)
+        }).decode(), file=sys.stderr)
         sys.exit(1)
 
+def run_worker():
+    """
+    Serve requests until stdin closes.
+    
+    Each input line is a JSON array of tweets and each output line is the
+    JSON result for that request.
+    """
+    def handle(line: bytes) -> Dict[str, Any]:
+        try:
+            tweets = orjson.loads(line)
+            if not isinstance(tweets, list):
+                tweets = [tweets]
+            return process_tweets(tweets)
+        except orjson.JSONDecodeError as e:
+            return {"error": f"Invalid JSON input: {str(e)}"}
+        except Exception as e:
+            return {"error": f"Error processing tweets: {str(e)}"}
+    
+    serve_worker(handle)
+
 if __name__ == "__main__":
-    main()
+    if "--worker" in sys.argv[1:]:
+        run_worker()
+    else:
+        main()
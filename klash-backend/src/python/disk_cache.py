@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+SQLite-backed result cache shared by the Klash model scripts.
+
+Each script keeps its results in its own table of one file, keyed by a
+content hash, so repeated tweets skip the model across CLI invocations.
+"""
+
+import os
+import sqlite3
+import time
+import logging
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Cache file shared by every model script
+DEFAULT_CACHE_PATH = os.environ.get(
+    "KLASH_CACHE_PATH", str(Path(__file__).parent / ".klash_cache.db")
+)
+
+# Max entries kept per table; the least recently used are pruned
+DEFAULT_CACHE_SIZE = int(os.environ.get("KLASH_CACHE_SIZE", "200000"))
+
+class DiskCache:
+    """JSON values stored by key in one table of the cache file."""
+
+    def __init__(self, path: str, table: str, max_size: int = DEFAULT_CACHE_SIZE):
+        """Open lazily on first use; `table` must be a trusted identifier."""
+        self.path = path
+        self.table = table
+        self.max_size = max_size
+        self.db = None
+        self.disabled = False
+
+    def connect(self) -> Optional[sqlite3.Connection]:
+        """Open the cache file, disabling the cache if it is unusable."""
+        if self.db is None and not self.disabled:
+            try:
+                self.db = sqlite3.connect(self.path)
+                with self.db:
+                    self.db.execute(
+                        f"CREATE TABLE IF NOT EXISTS {self.table} "
+                        "(key BLOB PRIMARY KEY, result TEXT NOT NULL, used_at REAL NOT NULL)"
+                    )
+                    self.db.execute(
+                        f"CREATE INDEX IF NOT EXISTS {self.table}_used_at "
+                        f"ON {self.table} (used_at)"
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"Disabling {self.table} at {self.path}: {str(e)}")
+                self.db = None
+                self.disabled = True
+        return self.db
+
+    def get(self, keys: List[bytes]) -> Dict[bytes, Any]:
+        """Return the stored values for whichever of `keys` are present."""
+        found = {}
+        db = self.connect()
+        if db is None or not keys:
+            return found
+        try:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = db.execute(
+                    f"SELECT key, result FROM {self.table} WHERE key IN "
+                    f"({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for key, result in rows:
+                    found[key] = orjson.loads(result)
+                if rows:
+                    # Mark hits as recently used so pruning keeps them
+                    with db:
+                        db.execute(
+                            f"UPDATE {self.table} SET used_at = ? WHERE key IN "
+                            f"({','.join('?' * len(rows))})",
+                            [time.time(), *(key for key, _ in rows)]
+                        )
+        except sqlite3.Error as e:
+            logger.warning(f"Error reading {self.table}: {str(e)}")
+        return found
+
+    def put(self, entries: Dict[bytes, Any]):
+        """Store `entries`, then prune the table back to `max_size`."""
+        db = self.connect()
+        if db is None or not entries:
+            return
+        try:
+            now = time.time()
+            with db:
+                db.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, result, used_at) "
+                    "VALUES (?, ?, ?)",
+                    [(key, orjson.dumps(value).decode(), now) for key, value in entries.items()]
+                )
+                db.execute(
+                    f"DELETE FROM {self.table} WHERE key IN "
+                    f"(SELECT key FROM {self.table} ORDER BY used_at DESC "
+                    "LIMIT -1 OFFSET ?)",
+                    (self.max_size,)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Error writing {self.table}: {str(e)}")
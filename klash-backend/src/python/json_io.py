@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+JSON output shared by the Klash Python scripts.
+
+Every script writes its result to stdout as one JSON document; the model
+scripts can also serve newline-delimited requests with `--worker`.
+"""
+
+import sys
+from typing import Any, Callable
+import orjson
+
+# Serialize numpy values natively and end each document with a newline.
+# Team labels and outcomes become dict keys, so non-string keys must serialize too.
+JSON_OUTPUT_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
+
+def write_json(result: Any):
+    """Write `result` to stdout as one JSON line and flush it."""
+    sys.stdout.buffer.write(orjson.dumps(result, option=JSON_OUTPUT_OPTIONS))
+    sys.stdout.flush()
+
+def serve_worker(handle: Callable[[bytes], Any]):
+    """
+    Serve requests until stdin closes.
+
+    Each non-blank input line is passed to `handle` and its result is written
+    as one output line. A request that raises or returns an unserializable
+    result gets an {"error": ...} line instead of stopping the worker.
+    """
+    while True:
+        line = sys.stdin.buffer.readline()
+        if not line:
+            break
+        if not line.strip():
+            continue
+
+        try:
+            result = handle(line)
+        except Exception as e:
+            result = {"error": f"Error processing request: {str(e)}"}
+
+        try:
+            output = orjson.dumps(result, option=JSON_OUTPUT_OPTIONS)
+        except TypeError as e:
+            # orjson.JSONEncodeError is a TypeError; report it instead of exiting
+            output = orjson.dumps({"error": f"Unserializable result: {str(e)}"},
+                                  option=JSON_OUTPUT_OPTIONS)
+        sys.stdout.buffer.write(output)
+        sys.stdout.flush()
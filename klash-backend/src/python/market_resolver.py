@@ -6,11 +6,12 @@ Automatically resolves prediction markets based on tweet sentiment and team clas
 """
 
 import sys
-import json
+import orjson
 import logging
 from datetime import datetime, timezone
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Union
 import numpy as np
+from json_io import write_json, serve_worker
 
 # Configure logging
 logging.basicConfig(
@@ -35,6 +36,7 @@ class MarketResolver:
         self.sentiment_analyzer = None
         self.team_classifier = None
         self.min_confidence = 0.6  # Minimum confidence threshold for classification
+        self._now_iso = None  # Timestamp shared by all responses of one resolution
         
     def initialize_models(self):
         """Lazy initialization of ML models."""
@@ -56,6 +58,7 @@ class MarketResolver:
         Returns:
             Dict with resolution results
         """
+        self._now_iso = datetime.now(timezone.utc).isoformat()
         try:
             # Validate input
             self._validate_market_data(market_data)
@@ -81,76 +84,54 @@ class MarketResolver:
         """Resolve market using sentiment analysis of reply tweets."""
         self.initialize_models()
         
-        # Initialize outcome counters
+        # Initialize outcome counters, indexed by outcome position
         outcomes = market_data['outcomes']
-        outcome_counts = {outcome: {"count": 0, "confidence_sum": 0.0} for outcome in outcomes}
-        total_analyzed = 0
+        outcome_index = {outcome: i for i, outcome in enumerate(outcomes)}
+        counts = np.zeros(len(outcomes), dtype=np.int64)
+        confidence_sums = np.zeros(len(outcomes), dtype=np.float64)
         
-        # Process each reply tweet
-        for tweet in market_data.get('reply_tweets', []):
-            if not isinstance(tweet, dict) or 'text' not in tweet:
-                continue
-                
-            # Classify tweet sentiment towards each outcome
-            try:
-                result = self.team_classifier.classify_tweet(
-                    tweet['text'], 
-                    outcomes
-                )
-                
-                # Only count if confidence is above threshold
-                if result['confidence'] >= self.min_confidence and result['team'] in outcome_counts:
-                    outcome = result['team']
-                    outcome_counts[outcome]['count'] += 1
-                    outcome_counts[outcome]['confidence_sum'] += result['confidence']
-                    total_analyzed += 1
-                    
-            except Exception as e:
-                logger.warning(f"Error processing tweet {tweet.get('id', 'unknown')}: {str(e)}")
+        # Classify all reply tweets against the outcomes in one batched call
+        texts = [tweet['text'] for tweet in market_data.get('reply_tweets', [])
+                 if isinstance(tweet, dict) and 'text' in tweet]
+        results = self.team_classifier.classify_batch(texts, outcomes)
+        
+        for result in results:
+            # Only count if confidence is above threshold
+            i = outcome_index.get(result['team'])
+            if i is not None and result['confidence'] >= self.min_confidence:
+                counts[i] += 1
+                confidence_sums[i] += result['confidence']
         
         # Calculate results
+        total_analyzed = int(counts.sum())
         if total_analyzed == 0:
             raise ValueError("No valid tweets could be analyzed for sentiment")
         
+        # Average confidence per outcome, computed once
+        avg_confidences = np.divide(
+            confidence_sums, counts,
+            out=np.zeros_like(confidence_sums), where=counts > 0
+        )
+        
         # Prepare sentiment breakdown
         sentiment_breakdown = {}
-        max_count = 0
-        winning_outcome = None
-        
-        for outcome, data in outcome_counts.items():
-            count = data['count']
+        for outcome, i in outcome_index.items():
+            count = int(counts[i])
             sentiment_breakdown[outcome] = {
                 'support_count': count,
-                'support_percentage': round(count / total_analyzed * 100, 2) if total_analyzed > 0 else 0,
-                'avg_confidence': round(data['confidence_sum'] / count, 4) if count > 0 else 0
+                'support_percentage': round(count / total_analyzed * 100, 2),
+                'avg_confidence': round(float(avg_confidences[i]), 4) if count > 0 else 0
             }
-            
-            # Track winning outcome
-            if count > max_count:
-                max_count = count
-                winning_outcome = outcome
-            elif count == max_count and max_count > 0:
-                # Handle tie by confidence
-                current_confidence = data['confidence_sum'] / count if count > 0 else 0
-                winning_confidence = outcome_counts[winning_outcome]['confidence_sum'] / max_count \
-                    if max_count > 0 else 0
-                if current_confidence > winning_confidence:
-                    winning_outcome = outcome
         
-        # If all outcomes have 0 count, mark as unresolved
-        if max_count == 0:
-            return self._pending_resolution(
-                market_data, 
-                "sentiment", 
-                "Insufficient data for sentiment analysis"
-            )
+        # Winning outcome has the most support; ties are broken by confidence,
+        # then by outcome order (lexsort is stable)
+        winning_index = int(np.lexsort((-avg_confidences, -counts))[0])
+        winning_outcome = outcomes[winning_index]
+        max_count = int(counts[winning_index])
         
         # Calculate confidence as percentage of winning outcome
         confidence = round(max_count / total_analyzed, 4)
         
-        # Get winning index
-        winning_index = outcomes.index(winning_outcome) if winning_outcome else -1
-        
         # Prepare and return result
         return {
             "market_id": market_data['market_id'],
@@ -162,7 +143,7 @@ class MarketResolver:
             "resolution_method": "sentiment",
             "sentiment_breakdown": sentiment_breakdown,
             "total_analyzed": total_analyzed,
-            "timestamp": datetime.now(timezone.utc).isoformat()
+            "timestamp": self._now_iso
         }
     
     def _pending_resolution(self, market_data: Dict[str, Any], method: str, 
@@ -178,7 +159,7 @@ class MarketResolver:
             "resolution_method": method,
             "status": "pending",
             "message": message,
-            "timestamp": datetime.now(timezone.utc).isoformat()
+            "timestamp": self._now_iso
         }
     
     def _validate_market_data(self, market_data: Dict[str, Any]):
@@ -199,14 +180,17 @@ class MarketResolver:
             "outcomes": market_data.get('outcomes', []),
             "error": error_msg,
             "status": "error",
-            "timestamp": datetime.now(timezone.utc).isoformat()
+            "timestamp": self._now_iso
         }
 
-def resolve_market() -> Dict[str, Any]:
+def resolve_market(input_text: Optional[Union[str, bytes]] = None,
+                   resolver: Optional[MarketResolver] = None) -> Dict[str, Any]:
     """
     Main function to resolve a market from stdin.
     
-    Expected input from stdin:
+    Pass an already initialized `resolver` to reuse its models across calls.
+    
+    Expected input from stdin (or `input_text`):
     {
         "market_id": "market_123",
         "question": "Will Bitcoin hit $100k by end of 2025?",
@@ -222,17 +206,19 @@ def resolve_market() -> Dict[str, Any]:
     """
     try:
         # Read and parse input
-        input_text = sys.stdin.read()
+        if input_text is None:
+            input_text = sys.stdin.buffer.read()
         if not input_text.strip():
             raise ValueError("No input provided")
             
         try:
-            market_data = json.loads(input_text)
-        except json.JSONDecodeError as e:
+            market_data = orjson.loads(input_text)
+        except orjson.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON input: {str(e)}")
         
         # Resolve market
-        resolver = MarketResolver()
+        if resolver is None:
+            resolver = MarketResolver()
         result = resolver.resolve_market(market_data)
         return result
         
@@ -244,16 +230,31 @@ def resolve_market() -> Dict[str, Any]:
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
 
+def run_worker():
+    """
+    Serve resolution requests until stdin closes.
+    
+    Each input line is a JSON market and each output line is the JSON result,
+    so both models are loaded once for the lifetime of the process.
+    """
+    resolver = MarketResolver()
+    resolver.initialize_models()
+    serve_worker(lambda line: resolve_market(line, resolver))
+
 if __name__ == "__main__":
+    if "--worker" in sys.argv[1:]:
+        run_worker()
+        sys.exit(0)
+    
     try:
         # Run resolution and print result as JSON
         result = resolve_market()
-        print(json.dumps(result, ensure_ascii=False, indent=2))
+        write_json(result)
     except Exception as e:
         error_result = {
             "error": str(e),
             "status": "error",
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
-        print(json.dumps(error_result, ensure_ascii=False, indent=2))
+        write_json(error_result)
         sys.exit(1)
@@ -1,11 +1,12 @@
 import sys
-import json
 import asyncio
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
 from twscrape import API, gather
 import os
 from dotenv import load_dotenv
+from json_io import write_json
 
 # Load environment variables
 load_dotenv()
@@ -13,6 +14,39 @@ load_dotenv()
 # Initialize twscrape API
 api = API()
 
+# Minimum (replies + quotes) / (likes + 1) ratio for a tweet to count as controversial
+CONTROVERSY_THRESHOLD = 0.3
+
+def filter_controversial(replies: np.ndarray, quotes: np.ndarray,
+                         likes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute controversy scores for a batch of tweets.
+    Returns (mask, scores) where mask marks tweets above the threshold.
+    """
+    scores = (replies + quotes) / (likes + 1)
+    return scores >= CONTROVERSY_THRESHOLD, scores
+
+def build_controversial_tweets(tweets: List[Any], author: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Score collected tweets in one vectorized pass and keep the controversial ones"""
+    count = len(tweets)
+    replies = np.fromiter((t.replyCount or 0 for t in tweets), dtype=np.int64, count=count)
+    quotes = np.fromiter((t.quoteCount or 0 for t in tweets), dtype=np.int64, count=count)
+    likes = np.fromiter((t.likeCount or 0 for t in tweets), dtype=np.int64, count=count)
+    
+    mask, scores = filter_controversial(replies, quotes, likes)
+    
+    return [{
+        "id": str(tweets[i].id),
+        "text": tweets[i].rawContent,
+        "author": author or tweets[i].user.username,
+        "created_at": tweets[i].date.isoformat(),
+        "replies": int(replies[i]),
+        "retweets": tweets[i].retweetCount,
+        "likes": int(likes[i]),
+        "quotes": int(quotes[i]),
+        "controversy_score": round(float(scores[i]), 2)
+    } for i in np.flatnonzero(mask)]
+
 async def search_controversies(query: str, limit: int = 50) -> List[Dict[str, Any]]:
     """
     Search for controversial tweets by keyword.
@@ -24,29 +58,10 @@ async def search_controversies(query: str, limit: int = 50) -> List[Dict[str, An
             # Skip tweets with no engagement
             if tweet.likeCount is None or tweet.retweetCount is None:
                 continue
-                
-            replies = tweet.replyCount or 0
-            quotes = tweet.quoteCount or 0
-            likes = tweet.likeCount or 0
-            
-            # Calculate controversy score
-            controversy_score = (replies + quotes) / (likes + 1)
-            
-            # Only include controversial tweets
-            if controversy_score >= 0.3:
-                tweets.append({
-                    "id": str(tweet.id),
-                    "text": tweet.rawContent,
-                    "author": tweet.user.username,
-                    "created_at": tweet.date.isoformat(),
-                    "replies": replies,
-                    "retweets": tweet.retweetCount,
-                    "likes": likes,
-                    "quotes": quotes,
-                    "controversy_score": round(controversy_score, 2)
-                })
+            tweets.append(tweet)
         
-        return tweets
+        # Only include controversial tweets
+        return build_controversial_tweets(tweets)
     except Exception as e:
         print(f"Error in search_controversies: {str(e)}", file=sys.stderr)
         return []
@@ -58,48 +73,42 @@ async def monitor_influencer(username: str, limit: int = 20) -> List[Dict[str, A
         if not user:
             return []
             
-        tweets = []
-        async for tweet in api.user_tweets(user.id, limit=limit):
-            replies = tweet.replyCount or 0
-            quotes = tweet.quoteCount or 0
-            likes = tweet.likeCount or 0
-            
-            controversy_score = (replies + quotes) / (likes + 1)
-            
-            if controversy_score >= 0.3:
-                tweets.append({
-                    "id": str(tweet.id),
-                    "text": tweet.rawContent,
-                    "author": username,
-                    "created_at": tweet.date.isoformat(),
-                    "replies": replies,
-                    "retweets": tweet.retweetCount,
-                    "likes": likes,
-                    "quotes": quotes,
-                    "controversy_score": round(controversy_score, 2)
-                })
-        
-        return tweets
+        tweets = [tweet async for tweet in api.user_tweets(user.id, limit=limit)]
+        return build_controversial_tweets(tweets, author=username)
     except Exception as e:
         print(f"Error in monitor_influencer: {str(e)}", file=sys.stderr)
         return []
 
+async def batch_monitor(usernames: List[str], limit: int = 20) -> List[Dict[str, Any]]:
+    """Monitor several users concurrently and merge their controversial tweets"""
+    results = await asyncio.gather(*[monitor_influencer(username, limit) for username in usernames])
+    return [tweet for tweets in results for tweet in tweets]
+
 async def get_replies(tweet_id: str, limit: int = 50) -> List[Dict[str, Any]]:
     """Get replies to a specific tweet"""
     try:
-        replies = []
+        # Collect plain tuples while streaming; build dicts once fetching is done
+        rows = []
         async for reply in api.tweet_replies(tweet_id, limit=limit):
-            replies.append({
-                "id": str(reply.id),
-                "text": reply.rawContent,
-                "author": reply.user.username,
-                "created_at": reply.date.isoformat(),
-                "replies": reply.replyCount or 0,
-                "retweets": reply.retweetCount or 0,
-                "likes": reply.likeCount or 0,
-                "quotes": reply.quoteCount or 0
-            })
-        return replies
+            rows.append((
+                str(reply.id), reply.rawContent, reply.user.username, reply.date,
+                reply.replyCount or 0, reply.retweetCount or 0,
+                reply.likeCount or 0, reply.quoteCount or 0
+            ))
+            # Periodically yield so the HTTP client keeps fetching
+            if len(rows) % 100 == 0:
+                await asyncio.sleep(0)
+        
+        return [{
+            "id": reply_id,
+            "text": text,
+            "author": author,
+            "created_at": date.isoformat(),
+            "replies": replies,
+            "retweets": retweets,
+            "likes": likes,
+            "quotes": quotes
+        } for reply_id, text, author, date, replies, retweets, likes, quotes in rows]
     except Exception as e:
         print(f"Error in get_replies: {str(e)}", file=sys.stderr)
         return []
@@ -107,7 +116,8 @@ async def get_replies(tweet_id: str, limit: int = 50) -> List[Dict[str, Any]]:
 def main():
     if len(sys.argv) < 3:
         print("Usage: python scraper.py <command> <arg1> [arg2]")
-        print("Commands: search <query> [limit], monitor <username> [limit], replies <tweet_id> [limit]")
+        print("Commands: search <query> [limit], monitor <username> [limit], "
+              "batch_monitor <user1,user2,...> [limit], replies <tweet_id> [limit]")
         sys.exit(1)
     
     command = sys.argv[1].lower()
@@ -119,12 +129,15 @@ def main():
             result = await search_controversies(arg, limit)
         elif command == "monitor":
             result = await monitor_influencer(arg, limit)
+        elif command == "batch_monitor":
+            usernames = [u.strip() for u in arg.split(",") if u.strip()]
+            result = await batch_monitor(usernames, limit)
         elif command == "replies":
             result = await get_replies(arg, limit)
         else:
             print(f"Unknown command: {command}", file=sys.stderr)
             sys.exit(1)
-        print(json.dumps(result, indent=2))
+        write_json(result)
     
     asyncio.run(run())
 
@@ -5,16 +5,19 @@ Uses ProsusAI/finbert model for financial sentiment analysis.
 """
 
 import sys
-import json
+import orjson
+import hashlib
 import logging
-import io
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, Union
+import numpy as np
 import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from transformers import pipeline
+from disk_cache import DiskCache, DEFAULT_CACHE_PATH
+from json_io import write_json, serve_worker
 
-# Fix Windows encoding
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+# Fix Windows encoding. Reconfigure in place rather than replacing
+# sys.stdout, so importing this module from another script is safe.
+sys.stdout.reconfigure(encoding='utf-8')
 
 # Configure logging
 logging.basicConfig(
@@ -27,36 +30,95 @@ logger = logging.getLogger(__name__)
 MODEL_NAME = "ProsusAI/finbert"
 MAX_LENGTH = 512  # Max sequence length for BERT models
 DEVICE = 0 if torch.cuda.is_available() else -1  # Use GPU if available
+DTYPE = torch.float16 if DEVICE >= 0 else torch.float32  # Half precision on GPU
+CACHE_SIZE = 50_000  # Max predictions kept in memory per analyzer
+LENGTH_BUCKETS = (64, 128, 256, MAX_LENGTH)  # Fixed padded token lengths
 
 class SentimentAnalyzer:
     """Wrapper for Hugging Face sentiment analysis model."""
     
-    def __init__(self):
-        """Initialize the sentiment analyzer with FinBERT model."""
+    def __init__(self, cache_path: Optional[str] = DEFAULT_CACHE_PATH):
+        """
+        Initialize the sentiment analyzer with FinBERT model.
+        
+        Predictions are persisted to the SQLite file at `cache_path`;
+        pass None to keep the cache in memory only.
+        """
         self.model = None
         self.tokenizer = None
-        self.classifier = None
         self.labels = ["positive", "negative", "neutral"]
+        self.cache = {}  # content hash -> prediction
+        self.disk_cache = DiskCache(cache_path, "sentiment_cache") if cache_path else None
+        self.static_shapes = DEVICE >= 0  # Pad batches to fixed length buckets
+        
+    def load_model(self, compile_model: bool = False):
+        """
+        Load the FinBERT model and tokenizer.
         
-    def load_model(self):
-        """Load the FinBERT model and tokenizer."""
+        `compile_model` enables torch.compile, which only pays off in
+        long-lived processes since the first forward pass triggers compilation.
+        """
         try:
             logger.info("Loading FinBERT model and tokenizer...")
+            if DEVICE >= 0:
+                # Let any remaining fp32 matmuls use TF32 tensor cores
+                torch.backends.cuda.matmul.allow_tf32 = True
+                torch.set_float32_matmul_precision('high')
             self.tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-            self.model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
-            # Create sentiment analysis pipeline
-            self.classifier = pipeline(
-                "sentiment-analysis",
-                model=self.model,
-                tokenizer=self.tokenizer,
-                device=0 if torch.cuda.is_available() else -1,
-                top_k=1  # Use top_k instead of return_all_scores
+            self.model = AutoModelForSequenceClassification.from_pretrained(
+                MODEL_NAME, torch_dtype=DTYPE
             )
+            self.model.eval()
+            if DEVICE == -1:
+                self.model = self.quantize_model(self.model)
+            else:
+                self.model.to(f"cuda:{DEVICE}")
+            if compile_model:
+                self.compile_model(self.model)
             logger.info("FinBERT model loaded successfully")
         except Exception as e:
             logger.error(f"Error loading model: {str(e)}")
             raise
     
+    def quantize_model(self, model):
+        """Apply dynamic int8 quantization to the linear layers for CPU inference."""
+        try:
+            quantized = torch.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            logger.info("Applied dynamic int8 quantization to FinBERT")
+            return quantized
+        except Exception as e:
+            # Some CPU builds ship without a quantized backend; fall back to FP32
+            logger.warning(f"Dynamic quantization unavailable, using FP32 model: {str(e)}")
+            return model
+    
+    def compile_model(self, model):
+        """Compile the model's forward pass with torch.compile when available."""
+        if not hasattr(torch, 'compile'):
+            return
+        eager_forward = model.forward
+        try:
+            # Only forward is compiled so the model keeps its PreTrainedModel
+            # API. dynamic=True avoids recompiling per tweet length.
+            model.forward = torch.compile(eager_forward, dynamic=True)
+            # Compilation is lazy; run one forward so failures (missing
+            # toolchain, unsupported quantized ops) surface here
+            inputs = self.tokenizer(
+                ["Warming up the FinBERT model."] * 2,
+                padding='max_length',
+                max_length=LENGTH_BUCKETS[0],
+                return_tensors='pt'
+            ).to(model.device)
+            with torch.inference_mode():
+                model(**inputs)
+            # Fixed shapes let the compiled graphs be reused across batches
+            self.static_shapes = True
+            logger.info("Compiled FinBERT forward pass with torch.compile")
+        except Exception as e:
+            model.forward = eager_forward
+            logger.warning(f"torch.compile unavailable, using eager mode: {str(e)}")
+    
     def preprocess_text(self, text: str) -> str:
         """Preprocess text for sentiment analysis."""
         # Truncate to max length while preserving whole words if possible
@@ -64,78 +126,115 @@ class SentimentAnalyzer:
             text = text[:MAX_LENGTH].rsplit(' ', 1)[0] + '...'
         return text.strip()
     
-    def predict_sentiment(self, text: str) -> Dict[str, Any]:
-        """Predict sentiment for a single text."""
-        if not self.classifier:
+    def predict_sentiments(self, texts: List[str], batch_size: int = 32) -> List[Dict[str, Any]]:
+        """Predict sentiment for a list of texts with batched forward passes."""
+        if self.model is None:
             self.load_model()
             
-        try:
-            # Preprocess text
-            processed_text = self.preprocess_text(text)
+        processed_texts = [self.preprocess_text(text) for text in texts]
+        if not processed_texts:
+            return []
             
-            # Get predictions
-            predictions = self.classifier(processed_text)
+        # Only run the model on texts that have not been seen before
+        keys = {t: self.cache_key(t) for t in processed_texts}
+        cached = self.get_cached(list(dict.fromkeys(keys.values())))
+        found = {t: cached[keys[t]] for t in keys if keys[t] in cached}
+        misses = [t for t in keys if t not in found]
+        new_entries = {}
+        for batch, bucket_length in self.plan_batches(misses, batch_size):
+            # Tokenize and move one batch at a time so only one batch is held
+            # on the device
+            inputs = self.tokenizer(
+                batch,
+                truncation=True,
+                padding='max_length' if bucket_length else 'longest',
+                max_length=bucket_length or MAX_LENGTH,
+                return_tensors='pt'
+            ).to(self.model.device)
+            with torch.inference_mode():
+                probabilities = torch.softmax(self.model(**inputs).logits.float(), dim=-1)
+            scores, label_ids = probabilities.max(dim=-1)
             
-            # Process predictions
-            detailed_results = []
-            total_polarity = 0.0
-            total_confidence = 0.0
-            
-            for pred in predictions:
-                # Handle single prediction case
-                if not isinstance(pred, list):
-                    pred = [pred]
-                    
-                # Get the first prediction (highest confidence)
-                if len(pred) > 0:
-                    pred = pred[0]
-                    
-                    sentiment = pred['label'].lower()
-                    confidence = float(pred['score'])
-                    
-                    # Convert sentiment to polarity (-1 to 1)
-                    if 'pos' in sentiment:
-                        polarity = 1.0
-                    elif 'neg' in sentiment:
-                        polarity = -1.0
-                    else:  # neutral or unknown
-                        polarity = 0.0
-                        
-                    total_polarity += polarity * confidence
-                    total_confidence += confidence
-                    
-                    detailed_results.append({
-                        'text': processed_text,
-                        'sentiment': sentiment,
-                        'confidence': confidence,
-                        'polarity': polarity
-                    })
-                    
-            # Calculate averages
-            sample_size = len(detailed_results)
-            if sample_size == 0:
-                raise ValueError("No valid tweets to analyze")
-                
-            avg_polarity = total_polarity / sample_size
-            avg_confidence = total_confidence / sample_size
-            
-            # Determine overall outcome
-            if avg_polarity > 0.3:
-                outcome = "POSITIVE"
-            elif avg_polarity < -0.3:
-                outcome = "NEGATIVE"
-            else:
-                outcome = "NEUTRAL"
-            
-            # Return final result
-            return {
-                "outcome": outcome,
-                "avg_polarity": float(avg_polarity),
-                "avg_confidence": float(avg_confidence),
-                "sample_size": sample_size,
-                "detailed_sentiments": detailed_results
-            }
+            for processed_text, label_id, score in zip(batch, label_ids.tolist(), scores.tolist()):
+                label = self.model.config.id2label[label_id]
+                found[processed_text] = self.parse_prediction(label, score)
+                new_entries[keys[processed_text]] = found[processed_text]
+        
+        self.store_cached(new_entries)
+        return [dict(found[processed_text]) for processed_text in processed_texts]
+    
+    def plan_batches(self, texts: List[str], batch_size: int) -> List[Tuple[List[str], Optional[int]]]:
+        """
+        Split texts into batches, each with the token length to pad it to.
+        
+        With static shapes (compiled or on CUDA) each batch pads to the smallest
+        length bucket that fits it. Otherwise texts are sorted by token count and
+        the length is None: each batch pads only to its longest text.
+        """
+        if not texts:
+            return []
+        lengths = self.tokenizer(texts, truncation=True, max_length=MAX_LENGTH,
+                                 return_length=True)['length']
+        if not self.static_shapes:
+            order = np.argsort(lengths, kind='stable')
+            ordered = [texts[j] for j in order]
+            return [(ordered[start:start + batch_size], None)
+                    for start in range(0, len(ordered), batch_size)]
+        
+        buckets = {}
+        for text, length in zip(texts, lengths):
+            bucket_length = next(b for b in LENGTH_BUCKETS if length <= b)
+            buckets.setdefault(bucket_length, []).append(text)
+        return [(bucket[start:start + batch_size], bucket_length)
+                for bucket_length, bucket in buckets.items()
+                for start in range(0, len(bucket), batch_size)]
+    
+    def cache_key(self, processed_text: str) -> bytes:
+        """Stable content hash of a preprocessed tweet and the model."""
+        payload = orjson.dumps([MODEL_NAME, processed_text])
+        return hashlib.blake2b(payload, digest_size=16).digest()
+    
+    def get_cached(self, keys: List[bytes]) -> Dict[bytes, Dict[str, Any]]:
+        """Look up cached predictions in memory first, then on disk."""
+        found = {key: self.cache[key] for key in keys if key in self.cache}
+        if self.disk_cache is not None:
+            stored = self.disk_cache.get([key for key in keys if key not in found])
+            self.cache.update(stored)
+            found.update(stored)
+        return found
+    
+    def store_cached(self, entries: Dict[bytes, Dict[str, Any]]):
+        """Save new predictions in memory, evicting the oldest first, and on disk."""
+        for key, prediction in entries.items():
+            if len(self.cache) >= CACHE_SIZE:
+                self.cache.pop(next(iter(self.cache)))
+            self.cache[key] = prediction
+        if self.disk_cache is not None:
+            self.disk_cache.put(entries)
+    
+    def parse_prediction(self, label: str, score: float) -> Dict[str, Any]:
+        """Convert the top predicted label and its probability into a sentiment result."""
+        sentiment = label.lower()
+        
+        # Convert sentiment to polarity (-1 to 1)
+        if 'pos' in sentiment:
+            polarity = 1.0
+        elif 'neg' in sentiment:
+            polarity = -1.0
+        else:  # neutral or unknown
+            polarity = 0.0
             
+        # The caller attaches the original text; the processed text may be truncated
+        return {
+            'sentiment': sentiment,
+            'confidence': float(score),
+            'polarity': polarity
+        }
+    
+    def predict_sentiment(self, text: str) -> Dict[str, Any]:
+        """Predict sentiment for a single text."""
+        try:
+            return self.predict_sentiments([text])[0]
         except Exception as e:
             logger.error(f"Error in sentiment prediction: {str(e)}")
             # Return neutral sentiment in case of errors
@@ -145,69 +244,66 @@ class SentimentAnalyzer:
                 "polarity": 0.0
             }
 
-def analyze_sentiment_hf() -> Dict[str, Any]:
+def analyze_sentiment_hf(input_text: Optional[Union[str, bytes]] = None,
+                         analyzer: Optional[SentimentAnalyzer] = None) -> Dict[str, Any]:
     """
     Main function to analyze sentiment of tweets from stdin.
     
-    Expected input: JSON array of tweets via stdin
+    Expected input: JSON array of tweets via stdin (or `input_text`)
     Returns: JSON with sentiment analysis results
+    
+    Pass an already loaded `analyzer` to reuse its model across calls.
     """
     try:
         # Read input from stdin
-        input_text = sys.stdin.read()
+        if input_text is None:
+            input_text = sys.stdin.buffer.read()
         if not input_text.strip():
             raise ValueError("No input provided")
             
         # Parse JSON input
         try:
-            tweets = json.loads(input_text)
+            tweets = orjson.loads(input_text)
             if not isinstance(tweets, list):
                 raise ValueError("Input must be a JSON array of tweets")
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON input: {str(e)}")
         
         # Initialize analyzer
-        analyzer = SentimentAnalyzer()
-        analyzer.load_model()
-        
-        # Process each tweet
-        results = []
-        total_polarity = 0.0
-        total_confidence = 0.0
+        if analyzer is None:
+            analyzer = SentimentAnalyzer()
+            analyzer.load_model()
         
+        # Keep only well-formed, non-empty tweets
+        valid_tweets = []
         for tweet in tweets:
             if not isinstance(tweet, dict) or 'text' not in tweet:
                 logger.warning("Skipping invalid tweet format")
                 continue
-                
-            tweet_id = tweet.get('id', 'unknown')
-            text = tweet.get('text', '')
-            
-            if not text.strip():
+            if not tweet.get('text', '').strip():
                 continue
-                
-            # Get sentiment prediction
-            sentiment_result = analyzer.predict_sentiment(text)
-            
-            # Add to results
-            result = {
-                "tweet_id": tweet_id,
-                "text": text,
-                **sentiment_result
-            }
-            results.append(result)
-            
-            # Update aggregates
-            total_polarity += sentiment_result["polarity"]
-            total_confidence += sentiment_result["confidence"]
+            valid_tweets.append(tweet)
         
-        # Calculate averages
-        sample_size = len(results)
+        sample_size = len(valid_tweets)
         if sample_size == 0:
             raise ValueError("No valid tweets to analyze")
-            
-        avg_polarity = total_polarity / sample_size
-        avg_confidence = total_confidence / sample_size
+        
+        # Run all tweets through the model in one batched call
+        predictions = analyzer.predict_sentiments([t['text'] for t in valid_tweets])
+        
+        results = [{
+            "tweet_id": tweet.get('id', 'unknown'),
+            "text": tweet['text'],
+            **prediction
+        } for tweet, prediction in zip(valid_tweets, predictions)]
+        
+        # Calculate averages in a single numpy pass
+        labels = np.array([r["sentiment"] for r in results])
+        confidences = np.fromiter((r["confidence"] for r in results), dtype=np.float64, count=sample_size)
+        polarities = np.where(labels == 'positive', 1, np.where(labels == 'negative', -1, 0))
+        
+        avg_polarity = polarities.mean()
+        avg_confidence = confidences.mean()
         
         # Determine overall outcome
         if avg_polarity > 0.3:
@@ -220,8 +316,8 @@ def analyze_sentiment_hf() -> Dict[str, Any]:
         # Return final result
         return {
             "outcome": outcome,
-            "avg_polarity": float(avg_polarity),
-            "avg_confidence": float(avg_confidence),
+            "avg_polarity": avg_polarity,
+            "avg_confidence": avg_confidence,
             "sample_size": sample_size,
             "detailed_sentiments": results
         }
@@ -237,11 +333,26 @@ def analyze_sentiment_hf() -> Dict[str, Any]:
             "detailed_sentiments": []
         }
 
+def run_worker():
+    """
+    Serve sentiment requests until stdin closes.
+    
+    Each input line is a JSON array of tweets and each output line is the
+    JSON result, so the model is loaded once for the lifetime of the process.
+    """
+    analyzer = SentimentAnalyzer()
+    analyzer.load_model(compile_model=True)
+    serve_worker(lambda line: analyze_sentiment_hf(line, analyzer))
+
 if __name__ == "__main__":
+    if "--worker" in sys.argv[1:]:
+        run_worker()
+        sys.exit(0)
+    
     try:
         # Run analysis and print result as JSON
         result = analyze_sentiment_hf()
-        print(json.dumps(result, ensure_ascii=False, indent=2))
+        write_json(result)
     except Exception as e:
         error_result = {
             "error": str(e),
@@ -251,5 +362,5 @@ if __name__ == "__main__":
             "sample_size": 0,
             "detailed_sentiments": []
         }
-        print(json.dumps(error_result, ensure_ascii=False, indent=2))
+        write_json(error_result)
         sys.exit(1)
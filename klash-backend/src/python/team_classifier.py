@@ -2,15 +2,24 @@
 """
 Team Classifier for Klash Prediction Markets
 
-Uses facebook/bart-large-mnli for zero-shot classification of tweets into teams.
+Uses valhalla/distilbart-mnli-12-3 (a distilled facebook/bart-large-mnli) for
+zero-shot (NLI-based) classification of tweets into teams.
 """
 
 import sys
-import json
+import os
+import orjson
+import hashlib
+import heapq
 import logging
-from typing import Dict, List, Any, Tuple, Optional
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Tuple, Optional, Pattern
 import numpy as np
-from transformers import pipeline
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from disk_cache import DiskCache, DEFAULT_CACHE_PATH
+from json_io import write_json, serve_worker
 
 # Configure logging
 logging.basicConfig(
@@ -19,31 +28,162 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Distilled BART-MNLI: ~3x less compute than bart-large-mnli with similar accuracy.
+# Set KLASH_TEAM_MODEL to use a different NLI model (e.g. facebook/bart-large-mnli).
+DEFAULT_MODEL_NAME = os.environ.get("KLASH_TEAM_MODEL", "valhalla/distilbart-mnli-12-3")
+
+# Same hypothesis the transformers zero-shot pipeline uses by default
+HYPOTHESIS_TEMPLATE = "This example is {}."
+
+# Highest-confidence supporters reported per team
+MAX_SUPPORTERS = 100
+
+# Tweets classified per classify_batch call in classify_teams
+CLASSIFY_CHUNK_SIZE = 1024
+
 class TeamClassifier:
     """Classify tweets into teams using zero-shot classification."""
     
-    def __init__(self, model_name: str = "facebook/bart-large-mnli"):
-        """Initialize the classifier with the specified model."""
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME,
+                 cache_path: Optional[str] = DEFAULT_CACHE_PATH):
+        """
+        Initialize the classifier with the specified model.
+        
+        Classifications are persisted to the SQLite file at `cache_path`;
+        pass None to keep the cache in memory only.
+        """
         self.model = None
+        self.tokenizer = None
+        self.entailment_id = -1
+        self.hypotheses = {}  # team labels -> tokenized hypotheses
         self.model_name = model_name
         self.device = 0 if torch.cuda.is_available() else -1  # Use GPU if available
         self.min_confidence = 0.5  # Minimum confidence threshold for classification
         self.dominance_threshold = 0.95  # Threshold for single team dominance
+        self.batch_size = 32  # Tweets per forward pass
+        self.cache = {}  # content hash -> team scores, ordered like the labels
+        self.cache_size = 50_000  # Max classifications kept in memory
+        self.disk_cache = DiskCache(cache_path, "classification_cache") if cache_path else None
         
     def load_model(self):
         """Load the zero-shot classification model."""
         try:
             logger.info(f"Loading {self.model_name} model...")
-            self.classifier = pipeline(
-                "zero-shot-classification",
-                model=self.model_name,
-                device=self.device
+            if self.device >= 0:
+                # Let any remaining fp32 matmuls use TF32 tensor cores
+                torch.backends.cuda.matmul.allow_tf32 = True
+                torch.set_float32_matmul_precision('high')
+            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            self.model = AutoModelForSequenceClassification.from_pretrained(
+                self.model_name, torch_dtype=self.model_dtype()
             )
+            self.model.eval()
+            if self.device >= 0:
+                self.model.to(f"cuda:{self.device}")
+            
+            # NLI label whose logit scores "premise entails hypothesis"
+            for label, label_id in self.model.config.label2id.items():
+                if label.lower().startswith("entail"):
+                    self.entailment_id = label_id
+                    break
+            
+            self.warmup()
             logger.info("Model loaded successfully")
         except Exception as e:
             logger.error(f"Error loading model: {str(e)}")
             raise
     
+    def warmup(self):
+        """Run one small forward pass so the first real batch skips kernel setup."""
+        premise = self.tokenizer("Warming up the team classifier model.",
+                                 add_special_tokens=False)['input_ids']
+        hypotheses = self.tokenizer([HYPOTHESIS_TEMPLATE.format("warmup")] * 2,
+                                    add_special_tokens=False)['input_ids']
+        self.nli_scores([premise], hypotheses)
+        if self.device >= 0:
+            torch.cuda.synchronize(self.device)
+    
+    def model_dtype(self):
+        """Half precision on GPU (bf16 where supported, else fp16), fp32 on CPU."""
+        if self.device < 0:
+            return torch.float32
+        return torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+    
+    def cache_key(self, text: str, team_labels: List[str]) -> bytes:
+        """Stable content hash of a tweet, the team labels and the model."""
+        # JSON encoding keeps fields unambiguous and accepts non-string labels
+        payload = orjson.dumps([self.model_name, text, team_labels])
+        return hashlib.blake2b(payload, digest_size=16).digest()
+    
+    def get_cached(self, keys: List[bytes]) -> Dict[bytes, List[float]]:
+        """Look up cached team scores in memory first, then on disk."""
+        found = {key: self.cache[key] for key in keys if key in self.cache}
+        if self.disk_cache is not None:
+            stored = self.disk_cache.get([key for key in keys if key not in found])
+            self.cache.update(stored)
+            found.update(stored)
+        return found
+    
+    def store_cached(self, entries: Dict[bytes, List[float]]):
+        """
+        Save new team scores in memory and on disk.
+        
+        Raw scores are cached rather than decisions so a changed
+        min_confidence applies to cached tweets too.
+        """
+        for key, scores in entries.items():
+            if len(self.cache) >= self.cache_size:
+                self.cache.pop(next(iter(self.cache)))
+            self.cache[key] = scores
+        if self.disk_cache is not None:
+            self.disk_cache.put(entries)
+    
+    def encode_hypotheses(self, team_labels: List[str]) -> List[List[int]]:
+        """Tokenize the hypothesis for each team once and reuse it for every tweet."""
+        labels_key = tuple(team_labels)
+        if labels_key not in self.hypotheses:
+            self.hypotheses[labels_key] = self.tokenizer(
+                [HYPOTHESIS_TEMPLATE.format(label) for label in team_labels],
+                add_special_tokens=False
+            )['input_ids']
+        return self.hypotheses[labels_key]
+    
+    def nli_scores(self, premises: List[List[int]], hypotheses: List[List[int]]) -> np.ndarray:
+        """
+        Score each tokenized premise against every hypothesis in one forward pass.
+        
+        Returns an (n_premises, n_hypotheses) array of entailment probabilities,
+        normalized across hypotheses as in single-label zero-shot classification.
+        """
+        max_length = min(
+            self.tokenizer.model_max_length,
+            getattr(self.model.config, "max_position_embeddings", 512)
+        ) - self.tokenizer.num_special_tokens_to_add(pair=True)
+        with_token_types = "token_type_ids" in self.tokenizer.model_input_names
+        
+        features = {"input_ids": []}
+        if with_token_types:
+            features["token_type_ids"] = []
+        for premise in premises:
+            for hypothesis in hypotheses:
+                # Only the premise is truncated, like truncation="only_first"
+                truncated = premise[:max(max_length - len(hypothesis), 0)]
+                features["input_ids"].append(
+                    self.tokenizer.build_inputs_with_special_tokens(truncated, hypothesis)
+                )
+                if with_token_types:
+                    features["token_type_ids"].append(
+                        self.tokenizer.create_token_type_ids_from_sequences(truncated, hypothesis)
+                    )
+        
+        inputs = self.tokenizer.pad(features, padding=True, return_tensors="pt")
+        inputs = {name: tensor.to(self.model.device) for name, tensor in inputs.items()}
+        with torch.inference_mode():
+            logits = self.model(**inputs).logits
+        
+        entailment = logits[:, self.entailment_id].float().view(len(premises), len(hypotheses))
+        return torch.softmax(entailment, dim=1).cpu().numpy()
+    
     def preprocess_text(self, text: str, max_length: int = 512) -> str:
         """Preprocess text for classification."""
         if not text:
@@ -51,47 +191,152 @@ class TeamClassifier:
         # Simple truncation while trying to preserve meaning
         return text[:max_length].strip()
     
-    def classify_tweet(self, text: str, team_labels: List[str]) -> Dict[str, Any]:
-        """Classify a single tweet into one of the teams."""
-        if not self.classifier:
-            self.load_model()
+    def compile_keywords(self, team_labels: List[str],
+                         team_keywords: Dict[str, List[str]]) -> List[Optional[Pattern]]:
+        """Build one case-insensitive whole-word pattern per team from its keywords."""
+        patterns = []
+        for label in team_labels:
+            keywords = [kw for kw in team_keywords.get(label, []) if isinstance(kw, str) and kw.strip()]
+            if not keywords:
+                patterns.append(None)
+                continue
+            # Longest first so overlapping keywords match the most specific one
+            alternatives = "|".join(re.escape(kw.strip()) for kw in sorted(keywords, key=len, reverse=True))
+            patterns.append(re.compile(rf"(?<!\w)(?:{alternatives})(?!\w)", re.IGNORECASE))
+        return patterns
+    
+    def results_from_scores(self, scores: np.ndarray, team_labels: List[str]) -> List[Dict[str, Any]]:
+        """Turn a (tweets, teams) score matrix into classification results."""
+        # Best match and score ranking for the whole matrix at once
+        best = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(scores)), best].tolist()
+        ranked = np.argsort(-scores, axis=1, kind='stable').tolist()
+        
+        return [{
+            "team": team_labels[best_idx] if confidence >= self.min_confidence else None,
+            "confidence": confidence,
+            "all_scores": {team_labels[k]: row[k] for k in label_order}
+        } for best_idx, confidence, label_order, row in zip(
+            best.tolist(), confidences, ranked, scores.tolist())]
+    
+    def classify_batch(self, texts: List[str], team_labels: List[str],
+                       batch_size: Optional[int] = None,
+                       keyword_patterns: Optional[List[Optional[Pattern]]] = None) -> List[Dict[str, Any]]:
+        """
+        Classify several tweets against the same teams in batched forward passes.
+        
+        With `keyword_patterns` (see compile_keywords), tweets matching exactly
+        one team's keywords are assigned to it at confidence 1.0 without
+        running the model.
+        """
+        if self.model is None:
+            raise RuntimeError("Model not loaded; call load_model() first")
+            
+        results = [{"team": None, "confidence": 0.0} for _ in texts]
+        
+        # Preprocess text; empty tweets stay unclassified
+        processed = []
+        for i, text in enumerate(texts):
+            text = self.preprocess_text(text)
+            if not text:
+                continue
+            
+            if keyword_patterns:
+                hits = [k for k, pattern in enumerate(keyword_patterns)
+                        if pattern is not None and pattern.search(text)]
+                if len(hits) == 1:
+                    results[i] = {
+                        "team": team_labels[hits[0]],
+                        "confidence": 1.0,
+                        "all_scores": {label: float(k == hits[0]) for k, label in enumerate(team_labels)}
+                    }
+                    continue
+            processed.append((i, text, self.cache_key(text, team_labels)))
+        
+        # Reuse scores for tweets already classified against these teams
+        cached = self.get_cached([key for _, _, key in processed])
+        hits = [(i, key) for i, _, key in processed if key in cached]
+        if hits:
+            cached_scores = np.array([cached[key] for _, key in hits])
+            for (i, _), result in zip(hits, self.results_from_scores(cached_scores, team_labels)):
+                results[i] = result
+        processed = [entry for entry in processed if entry[2] not in cached]
+        if not processed:
+            return results
+        
+        # Classify each distinct text once and fan the result out to duplicates
+        duplicates = {}
+        for i, _, key in processed:
+            duplicates.setdefault(key, []).append(i)
+        processed = [entry for entry in processed if duplicates[entry[2]][0] == entry[0]]
             
         try:
-            # Preprocess text
-            processed_text = self.preprocess_text(text)
-            if not processed_text:
-                return {"team": None, "confidence": 0.0}
-                
-            # Get classification
-            result = self.classifier(
-                processed_text,
-                candidate_labels=team_labels,
-                multi_label=False
-            )
+            # Tokenize every premise once; hypotheses are shared by all tweets
+            premises = self.tokenizer(
+                [text for _, text, _ in processed],
+                add_special_tokens=False
+            )['input_ids']
+            hypotheses = self.encode_hypotheses(team_labels)
             
-            # Get best match
-            best_idx = np.argmax(result['scores'])
-            confidence = float(result['scores'][best_idx])
-            team = result['labels'][best_idx] if confidence >= self.min_confidence else None
+            # Sort by token length so each batch pads to a similar size; the
+            # original indices travel with the texts to scatter results back
+            order = np.argsort([len(premise) for premise in premises], kind='stable')
+            batch_size = batch_size or self.batch_size
             
-            return {
-                "team": team,
-                "confidence": confidence,
-                "all_scores": dict(zip(result['labels'], map(float, result['scores'])))
-            }
+            new_entries = {}
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                scores = self.nli_scores([premises[j] for j in batch], hypotheses)
+                
+                for j, result, row in zip(batch, self.results_from_scores(scores, team_labels),
+                                          scores.tolist()):
+                    _, _, key = processed[j]
+                    new_entries[key] = row
+                    for i in duplicates[key]:
+                        results[i] = dict(result)
+            
+            self.store_cached(new_entries)
             
         except Exception as e:
-            logger.error(f"Error classifying tweet: {str(e)}")
-            return {"team": None, "confidence": 0.0, "error": str(e)}
+            logger.error(f"Error classifying tweets: {str(e)}")
+            for indices in duplicates.values():
+                for i in indices:
+                    results[i] = {"team": None, "confidence": 0.0, "error": str(e)}
+                
+        return results
+    
+    def classify_tweet(self, text: str, team_labels: List[str]) -> Dict[str, Any]:
+        """Classify a single tweet into one of the teams."""
+        return self.classify_batch([text], team_labels)[0]
+
+def top_supporters(members: np.ndarray, confidences: np.ndarray,
+                   limit: int = MAX_SUPPORTERS) -> np.ndarray:
+    """Indices of the `limit` most confident members, earliest first on ties."""
+    if len(members) <= limit:
+        return members
+    # Partial selection around the cutoff confidence instead of a full sort
+    member_confidences = confidences[members]
+    cutoff = np.partition(member_confidences, -limit)[-limit]
+    above = members[member_confidences > cutoff]
+    ties = members[member_confidences == cutoff][:limit - len(above)]
+    return np.concatenate((above, ties))
 
-def classify_teams() -> Dict[str, Any]:
+def classify_teams(data: Optional[Dict[str, Any]] = None,
+                   classifier: Optional[TeamClassifier] = None) -> Dict[str, Any]:
     """
     Main function to classify tweets into teams.
     
+    Pass `data` to classify in-process, and an already loaded `classifier`
+    to reuse its model across calls; otherwise input is read from stdin.
+    
+    Classification stops early once one team's dominance can no longer be
+    overturned by the remaining tweets; those are reported as unclassified.
+    
     Expected input from stdin:
     {
         "controversy": "Bitcoin will hit $100k by end of 2025",
         "teams": ["Will hit $100k", "Won't hit $100k"],
+        "team_keywords": {"Will hit $100k": ["moon", "bullish"]},  (optional)
         "tweets": [
             {"id": "1", "text": "...", "author": "username"},
             ...
@@ -100,16 +345,18 @@ def classify_teams() -> Dict[str, Any]:
     """
     try:
         # Read and parse input
-        input_text = sys.stdin.read()
-        if not input_text.strip():
-            raise ValueError("No input provided")
-            
-        try:
-            data = json.loads(input_text)
-            if not isinstance(data, dict) or 'controversy' not in data or 'teams' not in data or 'tweets' not in data:
-                raise ValueError("Invalid input format. Expected keys: controversy, teams, tweets")
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON input: {str(e)}")
+        if data is None:
+            input_text = sys.stdin.buffer.read()
+            if not input_text.strip():
+                raise ValueError("No input provided")
+                
+            try:
+                data = orjson.loads(input_text)
+            except orjson.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON input: {str(e)}")
+        
+        if not isinstance(data, dict) or 'controversy' not in data or 'teams' not in data or 'tweets' not in data:
+            raise ValueError("Invalid input format. Expected keys: controversy, teams, tweets")
         
         controversy = data['controversy']
         team_labels = data['teams']
@@ -121,80 +368,106 @@ def classify_teams() -> Dict[str, Any]:
         if not isinstance(tweets, list):
             raise ValueError("Tweets must be a list")
         
-        # Initialize classifier
-        classifier = TeamClassifier()
-        classifier.load_model()
-        
-        # Initialize team stats
-        team_stats = {team: {
-            "count": 0,
-            "percentage": 0.0,
-            "avg_confidence": 0.0,
-            "confidence_sum": 0.0,
-            "supporters": []
-        } for team in team_labels}
+        team_keywords = data.get('team_keywords') or {}
+        if not isinstance(team_keywords, dict) or not all(
+                isinstance(keywords, list) for keywords in team_keywords.values()):
+            raise ValueError("team_keywords must map team labels to lists of keywords")
         
-        unclassified_count = 0
+        # Initialize classifier
+        if classifier is None:
+            classifier = TeamClassifier()
+            classifier.load_model()
         
-        # Process each tweet
+        valid_tweets = []
         for tweet in tweets:
             if not isinstance(tweet, dict) or 'text' not in tweet:
                 logger.warning("Skipping invalid tweet format")
                 continue
+            valid_tweets.append(tweet)
+        
+        keyword_patterns = classifier.compile_keywords(team_labels, team_keywords) if team_keywords else None
+        
+        # Classify in chunks so only per-team totals and a bounded heap of
+        # (confidence, -position) supporters stay resident, however many tweets
+        team_index = {team: k for k, team in enumerate(team_labels)}
+        counts = np.zeros(len(team_labels), dtype=np.int64)
+        confidence_sums = np.zeros(len(team_labels))
+        supporter_heaps = {k: [] for k in team_index.values()}
+        
+        def collect_supporters(start: int, best: np.ndarray, confidences: np.ndarray):
+            for k, heap in supporter_heaps.items():
+                members = top_supporters(np.flatnonzero(best == k), confidences)
+                for j in members:
+                    # Min-heap: the weakest (then latest) supporter is evicted first
+                    entry = (float(confidences[j]), -(start + int(j)))
+                    if len(heap) < MAX_SUPPORTERS:
+                        heapq.heappush(heap, entry)
+                    else:
+                        heapq.heappushpop(heap, entry)
+        
+        # A single background thread updates the supporter heaps for each chunk
+        # while the next one is on the model; one worker keeps them race-free
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = []
+            for start in range(0, len(valid_tweets), CLASSIFY_CHUNK_SIZE):
+                chunk = valid_tweets[start:start + CLASSIFY_CHUNK_SIZE]
+                results = classifier.classify_batch(
+                    [tweet.get('text', '') for tweet in chunk], team_labels,
+                    keyword_patterns=keyword_patterns
+                )
                 
-            tweet_id = str(tweet.get('id', ''))
-            author = tweet.get('author', 'unknown')
-            text = tweet.get('text', '')
-            
-            # Classify tweet
-            result = classifier.classify_tweet(text, team_labels)
-            team = result.get('team')
-            confidence = result.get('confidence', 0.0)
-            
-            # Update team stats
-            if team and team in team_stats:
-                team_stats[team]["count"] += 1
-                team_stats[team]["confidence_sum"] += confidence
-                team_stats[team]["supporters"].append({
-                    "tweet_id": tweet_id,
-                    "author": author,
-                    "text": text,
-                    "confidence": confidence
-                })
-            else:
-                unclassified_count += 1
+                # Aggregate per team with numpy; -1 marks unclassified tweets
+                best = np.fromiter((team_index.get(r.get('team'), -1) for r in results),
+                                   dtype=np.intp, count=len(results))
+                confidences = np.fromiter((r.get('confidence', 0.0) for r in results),
+                                          dtype=np.float64, count=len(results))
+                classified = best >= 0
+                counts += np.bincount(best[classified], minlength=len(team_labels))
+                confidence_sums += np.bincount(best[classified], weights=confidences[classified],
+                                               minlength=len(team_labels))
+                pending.append(executor.submit(collect_supporters, start, best, confidences))
+                
+                # Stop once the leader stays dominant even if every remaining
+                # tweet went to another team; those tweets count as unclassified
+                remaining = len(valid_tweets) - (start + len(chunk))
+                if remaining and counts.max() >= classifier.dominance_threshold * (counts.sum() + remaining):
+                    logger.info(f"Dominance decided early; skipping {remaining} remaining tweets")
+                    break
+            for future in pending:
+                future.result()
         
-        # Calculate statistics
-        total_classified = sum(stats["count"] for stats in team_stats.values())
+        total_classified = int(counts.sum())
+        unclassified_count = len(valid_tweets) - total_classified
+        percentages = counts / total_classified * 100 if total_classified > 0 else np.zeros(len(team_labels))
+        avg_confidences = np.divide(confidence_sums, counts,
+                                    out=np.zeros(len(team_labels)), where=counts > 0)
+        
+        team_stats = {}
+        for team, k in team_index.items():
+            # Highest confidence first, ties in input order
+            team_stats[team] = {
+                "count": int(counts[k]),
+                "percentage": float(percentages[k]),
+                "avg_confidence": float(avg_confidences[k]),
+                "supporters": [{
+                    "tweet_id": str(valid_tweets[-position].get('id', '')),
+                    "author": valid_tweets[-position].get('author', 'unknown'),
+                    "text": valid_tweets[-position].get('text', ''),
+                    "confidence": confidence
+                } for confidence, position in sorted(supporter_heaps[k], reverse=True)]
+            }
         
-        # Check for single team dominance
+        # Determine winning team (highest percentage, with at least 50%)
         winning_team = None
         if total_classified > 0:
-            for team, stats in team_stats.items():
-                stats["percentage"] = stats["count"] / total_classified * 100
-                stats["avg_confidence"] = (
-                    stats["confidence_sum"] / stats["count"] 
-                    if stats["count"] > 0 else 0.0
-                )
-                # Determine winning team (highest percentage, with confidence > 50%)
-                if (stats["percentage"] / 100 >= 0.5 and 
-                    (winning_team is None or 
-                     stats["percentage"] > team_stats[winning_team]["percentage"])):
-                    winning_team = team
+            leader = int(np.argmax(percentages))
+            if percentages[leader] >= 50.0:
+                winning_team = team_labels[leader]
             
             # Check for dominance
-            if winning_team and team_stats[winning_team]["percentage"] >= 95.0:
+            if winning_team and team_stats[winning_team]["percentage"] >= classifier.dominance_threshold * 100:
                 logger.info(f"Single team dominance detected: {winning_team}")
         
-        # Clean up supporters list for output (keep only top 100 per team)
-        for team in team_stats:
-            # Sort supporters by confidence (highest first)
-            team_stats[team]["supporters"].sort(key=lambda x: x["confidence"], reverse=True)
-            # Keep only top 100 supporters
-            team_stats[team]["supporters"] = team_stats[team]["supporters"][:100]
-            # Remove confidence_sum from output
-            team_stats[team].pop("confidence_sum", None)
-        
         # Prepare result
         result = {
             "controversy": controversy,
@@ -210,27 +483,54 @@ def classify_teams() -> Dict[str, Any]:
         logger.error(f"Error in classify_teams: {str(e)}")
         return {
             "error": str(e),
-            "controversy": data.get('controversy', '') if 'data' in locals() else 'Unknown',
+            "controversy": data.get('controversy', '') if isinstance(data, dict) else 'Unknown',
             "winning_team": "Error",
             "team_stats": {},
             "total_classified": 0,
             "unclassified_count": 0
         }
 
+def run_worker():
+    """
+    Serve classification requests until stdin closes.
+    
+    Each input line is a JSON request (see classify_teams) and each output
+    line is the JSON result, so the model is loaded once for the lifetime
+    of the process.
+    """
+    classifier = TeamClassifier()
+    classifier.load_model()
+    
+    def handle(line: bytes) -> Dict[str, Any]:
+        try:
+            return classify_teams(orjson.loads(line), classifier)
+        except orjson.JSONDecodeError as e:
+            return {
+                "error": f"Invalid JSON input: {str(e)}",
+                "controversy": "Unknown",
+                "winning_team": "Error",
+                "team_stats": {},
+                "total_classified": 0,
+                "unclassified_count": 0
+            }
+    
+    serve_worker(handle)
+
 if __name__ == "__main__":
+    if "--worker" in sys.argv[1:]:
+        run_worker()
+        sys.exit(0)
+    
     try:
-        # Import torch here to avoid loading it when the module is imported
-        import torch
-        
         # Run classification and print result as JSON
         result = classify_teams()
-        print(json.dumps(result, ensure_ascii=False, indent=2))
+        write_json(result)
     except ImportError as e:
         error_result = {
             "error": f"Required package not found: {str(e)}",
             "solution": "Please install the required packages with: pip install -r requirements.txt"
         }
-        print(json.dumps(error_result, ensure_ascii=False, indent=2))
+        write_json(error_result)
         sys.exit(1)
     except Exception as e:
         error_result = {
@@ -241,5 +541,5 @@ if __name__ == "__main__":
             "total_classified": 0,
             "unclassified_count": 0
         }
-        print(json.dumps(error_result, ensure_ascii=False, indent=2))
+        write_json(error_result)
         sys.exit(1)
@@ -2,21 +2,23 @@
 """
 Test script for Klash AI components.
 
-This script tests the following components:
+This script tests the following components in-process, loading each
+model once and sharing it across tests:
 1. Sentiment Analysis (sentiment_hf.py)
 2. Team Classification (team_classifier.py)
 3. Market Resolution (market_resolver.py)
 """
 
+import io
 import sys
-import json
-import subprocess
+import orjson
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 
-# Fix Windows encoding
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+# Fix Windows encoding; other platforms already default to UTF-8
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
 # Add parent directory to path for module imports
 sys.path.append(str(Path(__file__).parent.parent))
@@ -42,41 +44,39 @@ SAMPLE_MARKET = {
         {"id": "r4", "text": "Not with these regulations", "author": "bear2"},
         {"id": "r5", "text": "Yes, the charts look very bullish", "author": "bull3"}
     ],
-    "closing_time": "2025-12-31T23:59:59Z"
+    "closing_time": "2025-12-31T23:59:59Z",
+    "resolution_method": "sentiment"
 }
 
-def run_script(script_name: str, input_data: Any) -> Dict[str, Any]:
-    """Run a Python script with the given input data."""
-    script_path = Path(__file__).parent / f"{script_name}.py"
-    if not script_path.exists():
-        raise FileNotFoundError(f"Script not found: {script_path}")
-    
-    try:
-        input_str = json.dumps(input_data, ensure_ascii=False) if not isinstance(input_data, str) else input_data
-        result = subprocess.run(
-            [sys.executable, str(script_path)],
-            input=input_str,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            check=True
-        )
-        return json.loads(result.stdout)
-    except subprocess.CalledProcessError as e:
-        print(f"Error running {script_name}:")
-        print(f"STDOUT: {e.stdout}")
-        print(f"STDERR: {e.stderr}")
-        raise
-    except json.JSONDecodeError:
-        print(f"Invalid JSON output from {script_name}:")
-        print(result.stdout)
-        raise
+# Models are loaded on first use and shared by all tests in this process
+_MODELS: Dict[str, Any] = {}
+
+def get_sentiment_analyzer():
+    """Return the shared FinBERT sentiment analyzer, loading it once."""
+    if "sentiment" not in _MODELS:
+        from sentiment_hf import SentimentAnalyzer
+        analyzer = SentimentAnalyzer()
+        analyzer.load_model()
+        _MODELS["sentiment"] = analyzer
+    return _MODELS["sentiment"]
+
+def get_team_classifier():
+    """Return the shared zero-shot team classifier, loading it once."""
+    if "team" not in _MODELS:
+        from team_classifier import TeamClassifier
+        classifier = TeamClassifier()
+        classifier.load_model()
+        _MODELS["team"] = classifier
+    return _MODELS["team"]
 
 def test_sentiment_analysis() -> bool:
     """Test the sentiment analysis script."""
     print("\n=== Testing Sentiment Analysis ===")
     try:
-        result = run_script("sentiment_hf", SAMPLE_TWEETS)
+        from sentiment_hf import analyze_sentiment_hf
+        result = analyze_sentiment_hf(orjson.dumps(SAMPLE_TWEETS), get_sentiment_analyzer())
+        if result.get("error"):
+            raise RuntimeError(result["error"])
         print("✅ Sentiment analysis successful")
         print(f"Overall sentiment: {result.get('outcome')} (confidence: {result.get('avg_confidence', 0):.2f})")
         print(f"Sample size: {result.get('sample_size')}")
@@ -94,7 +94,10 @@ def test_team_classification() -> bool:
             "teams": ["Pro-Bitcoin", "Anti-Bitcoin", "Neutral"],
             "tweets": SAMPLE_TWEETS
         }
-        result = run_script("team_classifier", input_data)
+        from team_classifier import classify_teams
+        result = classify_teams(input_data, get_team_classifier())
+        if result.get("error"):
+            raise RuntimeError(result["error"])
         print("✅ Team classification successful")
         print(f"Winning team: {result.get('winning_team')}")
         print("Team stats:")
@@ -109,13 +112,19 @@ def test_market_resolution() -> bool:
     """Test the market resolution script."""
     print("\n=== Testing Market Resolution ===")
     try:
-        result = run_script("market_resolver", SAMPLE_MARKET)
+        from market_resolver import MarketResolver
+        resolver = MarketResolver()
+        resolver.sentiment_analyzer = get_sentiment_analyzer()
+        resolver.team_classifier = get_team_classifier()
+        result = resolver.resolve_market(SAMPLE_MARKET)
+        if result.get("error"):
+            raise RuntimeError(result["error"])
         print("✅ Market resolution successful")
         print(f"Winning outcome: {result.get('winning_outcome')} (confidence: {result.get('confidence', 0):.2f})")
         print("Sentiment breakdown:")
         for outcome, stats in result.get('sentiment_breakdown', {}).items():
             if outcome != 'total_analyzed':
-                print(f"  - {outcome}: {stats.get('count')} tweets ({stats.get('percentage'):.1f}%)")
+                print(f"  - {outcome}: {stats.get('support_count', 0)} tweets ({stats.get('support_percentage', 0.0):.1f}%)")
         return True
     except Exception as e:
         print(f"❌ Market resolution test failed: {str(e)}")
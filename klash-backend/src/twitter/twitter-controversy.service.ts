@@ -1,4 +1,4 @@
-import { Injectable, Logger, Inject, forwardRef } from '@nestjs/common';
+import { Injectable, Logger, Inject, forwardRef, OnModuleDestroy } from '@nestjs/common';
 import { InjectModel } from '@nestjs/mongoose';
 import { Model } from 'mongoose';
 import * as path from 'path';
@@ -8,10 +8,18 @@ import { AptosService } from '../aptos/aptos.service';
 import { CreateControversyDto } from './dto/controversy.dto';
 import { Controversy, ControversyDocument, ControversyStatus } from './schemas/controversy.schema';
 
+interface AnalyzerWorker {
+  shell: PythonShell;
+  // Requests awaiting a reply from this process, in send order
+  pending: Array<{ resolve: (analysis: any) => void; reject: (err: Error) => void }>;
+}
+
 @Injectable()
-export class TwitterControversyService {
+export class TwitterControversyService implements OnModuleDestroy {
   private readonly logger = new Logger(TwitterControversyService.name);
   private readonly pythonScriptsPath: string;
+  // Long-lived analyzer.py process so the interpreter and imports load only once
+  private analyzerWorker: AnalyzerWorker | null = null;
 
   constructor(
     @InjectModel(Controversy.name) private controversyModel: Model<ControversyDocument>,
@@ -21,6 +29,15 @@ export class TwitterControversyService {
     this.pythonScriptsPath = path.join(process.cwd(), 'src', 'python');
   }
 
+  onModuleDestroy() {
+    const worker = this.analyzerWorker;
+    if (worker) {
+      // Detach first so the close handler knows this exit was requested
+      this.analyzerWorker = null;
+      worker.shell.kill();
+    }
+  }
+
   async searchControversies(query: string, limit = 50): Promise<ControversyDocument[]> {
     try {
       const result = await this.runPythonScript('scraper.py', ['search', query, limit.toString()]);
@@ -91,8 +108,7 @@ export class TwitterControversyService {
       const replies = await this.getTweetReplies(tweetId, maxReplies);
       
       // Analyze sentiment of the replies
-      const result = await this.runPythonScript('analyzer.py', [], JSON.stringify(replies));
-      const analysis = JSON.parse(result);
+      const analysis = await this.runAnalyzer(JSON.stringify(replies));
       
       // Update the controversy with the sentiment analysis
       await this.controversyModel.findOneAndUpdate(
@@ -242,6 +258,65 @@ export class TwitterControversyService {
     });
   }
 
+  private getAnalyzerWorker(): AnalyzerWorker {
+    if (this.analyzerWorker) {
+      return this.analyzerWorker;
+    }
+
+    const shell = new PythonShell('analyzer.py', {
+      mode: 'text' as const,
+      pythonPath: 'python',
+      pythonOptions: ['-u'], // unbuffered output
+      scriptPath: this.pythonScriptsPath,
+      args: ['--worker'],
+    });
+    const worker: AnalyzerWorker = { shell, pending: [] };
+
+    // The worker answers requests in order, one JSON line per request
+    shell.on('message', (message: string) => {
+      const pending = worker.pending.shift();
+      if (!pending) {
+        return;
+      }
+
+      let analysis: any;
+      try {
+        analysis = JSON.parse(message);
+      } catch (error) {
+        pending.reject(new Error(`Invalid analyzer.py output: ${error.message}`));
+        return;
+      }
+      // The worker reports failures in-band instead of exiting
+      if (analysis && analysis.error) {
+        pending.reject(new Error(analysis.error));
+      } else {
+        pending.resolve(analysis);
+      }
+    });
+
+    const failPending = (err: Error) => {
+      if (this.analyzerWorker === worker) {
+        this.logger.error(`Python worker analyzer.py error: ${err.message}`, err.stack);
+        this.analyzerWorker = null;
+      }
+      worker.pending.splice(0).forEach(({ reject }) => reject(err));
+    };
+    shell.on('error', failPending);
+    // Only unexpected exits are logged; onModuleDestroy detaches the worker first
+    shell.on('close', () => failPending(new Error('analyzer.py worker exited')));
+
+    this.analyzerWorker = worker;
+    return worker;
+  }
+
+  private runAnalyzer(input: string): Promise<any> {
+    return new Promise((resolve, reject) => {
+      const worker = this.getAnalyzerWorker();
+      worker.pending.push({ resolve, reject });
+      worker.shell.send(input);
+    });
+  }
+
   // Additional helper methods
   async findAll(query: any = {}): Promise<ControversyDocument[]> {
     const { page = 1, limit = 20, ...filters } = query;